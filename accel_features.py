@@ -0,0 +1,79 @@
+import csv
+import os
+import numpy as np
+
+SAMPLE_RATE = 10000
+WINDOW_SIZE = 1024
+HOP_SIZE = 512
+FEATURES_PATH = "static/save_data/accel_features.csv"
+FEATURE_FIELDS = [
+    "user_id", "trial", "num_samples",
+    "rms_x", "rms_y", "rms_z",
+    "dominant_freq", "spectral_centroid",
+    "env_rmse", "env_corr"
+]
+
+
+def _frames(x, window_size, hop_size):
+    # x: (n, ...) -> (num_frames, ..., window_size)
+    if len(x) < window_size:
+        x = np.concatenate([x, np.zeros((window_size - len(x),) + x.shape[1:])])
+    return np.lib.stride_tricks.sliding_window_view(x, window_size, axis=0)[::hop_size]
+
+
+def extract_accel_features(accel, vib_amp, sample_rate=SAMPLE_RATE, window_size=WINDOW_SIZE, hop_size=HOP_SIZE):
+    accel = np.asarray(accel, dtype=np.float64)
+    accel = accel - accel.mean(axis=0)  # 축별 DC offset 제거
+    num_samples = len(accel)
+
+    # 축별 RMS
+    rms = np.sqrt(np.mean(accel ** 2, axis=0))
+
+    # 윈도우 FFT (Hann) -> 평균 파워 스펙트럼 (세 축 합산)
+    frames = _frames(accel, window_size, hop_size)  # (num_frames, 3, window_size)
+    spec = np.abs(np.fft.rfft(frames * np.hanning(window_size), axis=-1)) ** 2
+    psd = spec.mean(axis=0).sum(axis=0)
+    freqs = np.fft.rfftfreq(window_size, 1.0 / sample_rate)
+    dominant_freq = freqs[np.argmax(psd[1:]) + 1]
+    spectral_centroid = np.sum(freqs * psd) / np.sum(psd) if np.sum(psd) > 0 else 0.0
+
+    # 프레임별 진동 크기(벡터 RMS) vs. 명령 vib_amp 포락선
+    envelope = np.sqrt(np.mean(np.sum(frames ** 2, axis=1), axis=-1))
+    centers = (np.arange(len(envelope)) * hop_size + window_size / 2) / max(num_samples, window_size)
+    vib_amp = np.asarray(vib_amp, dtype=np.float64)
+    commanded = np.interp(np.clip(centers, 0, 1) * (len(vib_amp) - 1), np.arange(len(vib_amp)), vib_amp)
+
+    # 프레임이 하나뿐이면(로그 < 1 window) 두 포락선이 모두 1로 정규화되어 비교 의미 없음
+    if len(envelope) >= 2 and envelope.max() > 0 and commanded.max() > 0:
+        env_n = envelope / envelope.max()
+        cmd_n = commanded / commanded.max()
+        env_rmse = np.sqrt(np.mean((env_n - cmd_n) ** 2))
+        env_corr = np.corrcoef(env_n, cmd_n)[0, 1] if env_n.std() > 0 and cmd_n.std() > 0 else 0.0
+    else:
+        env_rmse, env_corr = np.nan, np.nan
+
+    return {
+        "num_samples": num_samples,
+        "rms_x": float(rms[0]),
+        "rms_y": float(rms[1]),
+        "rms_z": float(rms[2]),
+        "dominant_freq": float(dominant_freq),
+        "spectral_centroid": float(spectral_centroid),
+        "env_rmse": float(env_rmse),
+        "env_corr": float(env_corr)
+    }
+
+
+def load_accel_log(accel_path):
+    return np.loadtxt(accel_path, delimiter=",", skiprows=1, ndmin=2)
+
+
+def save_accel_features(user_id, trial, accel_path, vib_amp, features_path=FEATURES_PATH):
+    features = extract_accel_features(load_accel_log(accel_path), vib_amp)
+    os.makedirs(os.path.dirname(features_path), exist_ok=True)
+    with open(features_path, "a", newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FEATURE_FIELDS)
+        if f.tell() == 0:
+            writer.writeheader()
+        writer.writerow({"user_id": user_id, "trial": trial, **features})
+    return features
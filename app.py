@@ -10,8 +10,11 @@ import threading
 import queue
 from functools import wraps
 from user_info import save_user_info
-from play_signal.play_vib_ther_signal import run_stim_from_json  # 내부에 timestamp 처리 있음
+from accel_features import save_accel_features
+from ratings_aggregate import GROUP_KEYS, RatingsAggregate
+from play_signal.play_vib_ther_signal import resolve_channels, run_stim_from_json  # 내부에 timestamp 처리 있음
 import csv
+import socket
 
 mimetypes.add_type('application/javascript', '.mjs')
 
@@ -19,6 +22,8 @@ app = Flask(__name__)
 app.secret_key = "1234"
 last_unix_time = 0
 event_queue = queue.Queue()
+STATION_ID = os.environ.get("STATION_ID", socket.gethostname())  # 실험 장비(rig) 구분용
+ratings_aggregate = RatingsAggregate()  # archive 로딩은 첫 /analytics/ratings 요청에서 시작 (import 시 X)
 
 # === 로그인 체크 데코레이터 ===
 def login_required(f):
@@ -98,6 +103,14 @@ def play_signals():
     global last_unix_time
     data = request.get_json()
     user_id = session.get("user_id")
+
+    # 다중 부위 요청은 서버의 site -> AO 채널 설정에 있는 site만 허용
+    if data.get("channels"):
+        try:
+            resolve_channels(data["channels"], data.get("duration", 5))
+        except (ValueError, TypeError, AttributeError, OSError) as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
     last_unix_time = int(time.time())
     data["timestamp"] = last_unix_time
     data["user_id"] = user_id
@@ -153,6 +166,7 @@ def save_result():
     os.makedirs(user_dir, exist_ok=True)
 
     # === Save JSON data ===
+    data["station"] = STATION_ID
     json_path = f"{user_dir}/{trial}_collected_data.json"
     with open(json_path, "w") as f:
         json.dump(data, f)
@@ -199,7 +213,39 @@ def save_result():
             "accel_path": accel_dst
         })
 
+    # === Update in-memory ratings aggregate ===
+    try:
+        ratings_aggregate.add_trial(user_id, gender, trial, data)
+    except Exception as e:
+        print(f"[ANALYTICS ERROR] Could not update ratings aggregate: {e}")
+
+    # === Accel feature summary (accel_features.csv) ===
+    if os.path.exists(accel_dst):
+        try:
+            save_accel_features(user_id, trial, accel_dst, data["vib_amp"])
+        except Exception as e:
+            print(f"[FEATURE ERROR] Could not extract accel features: {e}")
+
     return jsonify({"status": "success", "message": "Data saved successfully"})
 
+@app.route("/analytics/ratings")
+@login_required
+def analytics_ratings():
+    # e.g. /analytics/ratings?group_by=gender,vibrationInfo
+    group_by = [key for key in request.args.get("group_by", "").split(",") if key]
+    unknown = [key for key in group_by if key not in GROUP_KEYS]
+    if unknown:
+        return jsonify({"status": "error", "message": f"Unknown group_by: {unknown}", "group_keys": GROUP_KEYS}), 400
+
+    ratings_aggregate.start_loading()  # 처음 한 번만 background 로딩 시작
+    groups = ratings_aggregate.stats(group_by)
+    return jsonify({
+        "status": "success",
+        "group_by": group_by,
+        "total": len(ratings_aggregate),
+        "loading": not ratings_aggregate.loaded,
+        "groups": groups
+    })
+
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=8080, debug=True)
@@ -0,0 +1,338 @@
+# -------------------------
+# 성능 벤치마크: 합성 데이터로만 실행, 기준(baseline) JSON 대비 회귀 검사
+#
+#   python benchmarks/run_benchmarks.py --save-baseline      # 기준값 저장
+#   python benchmarks/run_benchmarks.py --threshold 20       # 20% 이상 (그리고 5 ms 이상) 느려지면 실패
+# -------------------------
+
+import argparse
+import csv
+import json
+import os
+import runpy
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+DEFAULT_THRESHOLD = 20.0
+DEFAULT_MIN_DELTA_MS = 5.0  # 이보다 작은 절대 증가량은 회귀로 보지 않음
+
+SIGNAL_DURATIONS = [1, 5, 10]
+ENVELOPE_LENGTHS = [100, 1000]
+MULTICHANNEL_COUNTS = [2, 4, 8]
+ARCHIVE_SIZES = [100, 1000, 10000, 100000]
+PREPROCESS_SIZES = [10, 50]
+RISE_RETURN_REPEAT = 5  # arduino_delta_to_0.py의 REPEAT와 동일
+
+SAMPLE_RATE = 10000
+BENCH_USER = "bench"
+
+# play_signal/generate_signal.py는 import 시점에 상대경로로 Coeff.txt를 읽음
+os.chdir(REPO_ROOT)
+sys.path.insert(0, REPO_ROOT)
+
+
+@contextmanager
+def working_dir(path):
+    prev = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(prev)
+
+
+def time_it(fn, repeat, setup=None):
+    # (setup 후) fn을 repeat회 실행한 시간 중 최솟값 반환 (초) - 노이즈(스케줄링, 캐시)에 덜 민감
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+# -------------------------
+# 합성 데이터
+# -------------------------
+def make_envelopes(length, rng):
+    vib_amp = rng.uniform(0.0, 1.0, length)
+    vib_freq = rng.uniform(0.0, 1.0, length)
+    thermal_amp = rng.uniform(-3.0, 3.0, length)
+    return vib_amp, vib_freq, thermal_amp
+
+
+def make_trial_payload(duration, rng, envelope_length=100):
+    vib_amp, vib_freq, thermal_amp = make_envelopes(envelope_length, rng)
+    n = int(duration * SAMPLE_RATE)
+    return {
+        "vib_signal": rng.uniform(-1.0, 1.0, n).tolist(),
+        "vib_amp": vib_amp.tolist(),
+        "vib_freq": vib_freq.tolist(),
+        "thermal_signal": thermal_amp.tolist(),
+        "sample_rate": SAMPLE_RATE,
+        "duration": duration,
+        "body_sites": {"vibrationInfo": "1111", "thermalInfo": "1121"},
+        "ratings": {
+            "roughness": str(rng.integers(0, 101)),
+            "valence": str(rng.integers(0, 101)),
+            "arousal": str(rng.integers(0, 101)),
+            "referral": str(rng.integers(0, 5)),
+            "masking": str(rng.integers(0, 5)),
+        },
+    }
+
+
+def make_arduino_log(path, delta, duration_s=10, rate=10, baseline=32.5):
+    millis = np.arange(int(duration_s * rate)) * (1000 // rate)
+    half = len(millis) // 2
+    deltas = np.where(np.arange(len(millis)) < half, delta, 0.0)
+    setpoint = baseline + deltas
+    # 1차 지연 응답으로 온도 모사
+    temp = np.empty(len(millis))
+    temp[0] = baseline
+    for i in range(1, len(millis)):
+        temp[i] = temp[i - 1] + 0.2 * (setpoint[i] - temp[i - 1])
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Millis", "Input_Temperature", "Setpoint", "Delta", "PWM", "Received"])
+        for row in zip(millis, temp, setpoint, deltas):
+            writer.writerow([row[0], f"{row[1]:.2f}", f"{row[2]:.2f}", f"{row[3]:.2f}", 0, f"Received:{row[3]:.2f}"])
+
+
+def make_accel_log(path, duration_s, rng):
+    n = int(duration_s * SAMPLE_RATE)
+    np.savetxt(path, rng.normal(0.0, 0.1, (n, 3)), delimiter=",", header="X,Y,Z", comments="", fmt="%.5f")
+
+
+def make_archive(root, num_trials, rng, with_files=False, duration=1):
+    # static/save_data/ 구조를 num_trials개 trial로 구성
+    save_root = os.path.join(root, "static", "save_data")
+    os.makedirs(os.path.join(save_root, BENCH_USER, "logs"), exist_ok=True)
+
+    with open(os.path.join(save_root, "users.csv"), "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=["name", "user_id", "gender"])
+        writer.writeheader()
+        writer.writerow({"name": BENCH_USER, "user_id": BENCH_USER, "gender": "female"})
+
+    with open(os.path.join(save_root, "dataset.csv"), "w", newline="") as f:
+        fieldnames = ["user_id", "gender", "trial", "json_path", "arduino_path", "accel_path"]
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for trial in range(1, num_trials + 1):
+            user_dir = f"static/save_data/{BENCH_USER}/{trial}"
+            os.makedirs(os.path.join(root, user_dir), exist_ok=True)
+            row = {
+                "user_id": BENCH_USER,
+                "gender": 0,
+                "trial": trial,
+                "json_path": f"{user_dir}/{trial}_collected_data.json",
+                "arduino_path": f"{user_dir}/{trial}_arduino_log.csv",
+                "accel_path": f"{user_dir}/{trial}_accel_log.csv",
+            }
+            writer.writerow(row)
+            if with_files:
+                with open(os.path.join(root, row["json_path"]), "w") as f_json:
+                    json.dump(make_trial_payload(duration, rng), f_json)
+                make_arduino_log(os.path.join(root, row["arduino_path"]), rng.uniform(-6, 6), duration_s=duration)
+                make_accel_log(os.path.join(root, row["accel_path"]), duration, rng)
+
+
+# -------------------------
+# 벤치마크
+# -------------------------
+def bench_generate_signal(results, repeat, rng):
+    from play_signal.generate_signal import generate_signal, generate_signal_with_thermal, generate_multichannel_signal
+
+    for length in ENVELOPE_LENGTHS:
+        vib_amp, vib_freq, thermal_amp = make_envelopes(length, rng)
+        for duration in SIGNAL_DURATIONS:
+            results[f"generate_signal/env{length}/{duration}s"] = time_it(
+                lambda: generate_signal(vib_amp, vib_freq, duration, logscale=True), repeat)
+            results[f"generate_signal_with_thermal/env{length}/{duration}s"] = time_it(
+                lambda: generate_signal_with_thermal(vib_amp, vib_freq, thermal_amp, duration,
+                                                     logscale=True, thermal_rate=10), repeat)
+
+    for num_channels in MULTICHANNEL_COUNTS:
+        channels = []
+        for ch in range(num_channels):
+            vib_amp, vib_freq, _ = make_envelopes(100, rng)
+            channels.append({"vib_amp": vib_amp, "vib_freq": vib_freq, "delay": 0.1 * ch})
+        results[f"generate_multichannel_signal/{num_channels}ch/5s"] = time_it(
+            lambda: generate_multichannel_signal(channels, 5, logscale=True), repeat)
+
+
+def bench_save_user_info(results, repeat, rng, sizes):
+    from user_info import save_user_info
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            make_archive(tmp, size, rng)
+            with working_dir(tmp):
+                results[f"save_user_info/{size}"] = time_it(
+                    lambda: save_user_info(BENCH_USER, BENCH_USER, "female"), repeat)
+
+
+def bench_save_result(results, repeat, rng, sizes):
+    import app as app_module
+    app = app_module.app
+
+    payload = make_trial_payload(5, rng)
+    accel_src = f"static/save_data/{BENCH_USER}/logs/accel_log_{app_module.last_unix_time}.csv"
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            make_archive(tmp, size, rng)
+            with working_dir(tmp):
+                client = app.test_client()
+                with client.session_transaction() as sess:
+                    sess["user_id"] = BENCH_USER
+                    sess["gender"] = 0
+                # save_result가 accel log를 옮기고 feature를 추출하도록 매 POST 전에 생성
+                results[f"save_result/{size}"] = time_it(
+                    lambda: client.post("/save_result", json=payload), repeat,
+                    setup=lambda: make_accel_log(accel_src, payload["duration"], rng))
+
+
+def bench_accel_features(results, repeat, rng):
+    from accel_features import extract_accel_features
+
+    vib_amp, _, _ = make_envelopes(100, rng)
+    for duration in SIGNAL_DURATIONS:
+        accel = rng.normal(0.0, 0.1, (int(duration * SAMPLE_RATE), 3))
+        results[f"extract_accel_features/{duration}s"] = time_it(
+            lambda: extract_accel_features(accel, vib_amp), repeat)
+
+
+def bench_data_preprocess(results, repeat, rng):
+    script = os.path.join(REPO_ROOT, "data_preprocess.py")
+    for size in PREPROCESS_SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            make_archive(tmp, size, rng, with_files=True)
+            with working_dir(tmp):
+                results[f"data_preprocess/{size}"] = time_it(
+                    lambda: runpy.run_path(script, run_name="__main__"), repeat)
+
+
+def bench_compute_rising_return(results, repeat, rng):
+    script = os.path.join(REPO_ROOT, "play_signal", "compute_rising_return.py")
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "logs", "20250416")
+        for delta in np.arange(-6.0, 6.1, 1.0):
+            if delta == 0.0:
+                continue
+            folder = os.path.join(base, f"delta_{delta:.1f}")
+            os.makedirs(folder, exist_ok=True)
+            for run in range(1, RISE_RETURN_REPEAT + 1):
+                make_arduino_log(os.path.join(folder, f"run_{run}.csv"), delta)
+        with working_dir(tmp):
+            results["compute_rising_return"] = time_it(
+                lambda: runpy.run_path(script, run_name="__main__"), repeat)
+
+
+# -------------------------
+# 기준값 비교
+# -------------------------
+def compare(results, baseline, threshold, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    regressions = []
+    for name, value in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            print(f"  {name:<55} {value * 1000:10.2f} ms   (no baseline)")
+            continue
+        change = (value - base) / base * 100 if base > 0 else 0.0
+        slower_ms = (value - base) * 1000
+        flag = "REGRESSION" if change > threshold and slower_ms > min_delta_ms else ""
+        print(f"  {name:<55} {value * 1000:10.2f} ms   {change:+7.1f}%  {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def missing_metrics(results, baseline):
+    # baseline에는 있는데 이번 실행에서 측정되지 않은 항목
+    missing = sorted(set(baseline) - set(results))
+    for name in missing:
+        print(f"  {name:<55} {'':>10}      NOT MEASURED")
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SketchTactile performance benchmarks")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help=f"allowed slowdown in percent (default: value stored in baseline, else {DEFAULT_THRESHOLD:.0f})")
+    parser.add_argument("--min-delta-ms", type=float, default=None,
+                        help=f"ignore slowdowns smaller than this in absolute time (default: baseline value, else {DEFAULT_MIN_DELTA_MS:.0f})")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="exit 0 (report only) when the baseline file does not exist")
+    parser.add_argument("--repeat", type=int, default=10, help="runs per benchmark (minimum is reported)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=ARCHIVE_SIZES, help="archive sizes (trials)")
+    parser.add_argument("--only", nargs="+", default=None,
+                        help="subset: generate_signal save_user_info save_result accel_features data_preprocess compute_rising_return")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    benches = {
+        "generate_signal": lambda r: bench_generate_signal(r, args.repeat, rng),
+        "save_user_info": lambda r: bench_save_user_info(r, args.repeat, rng, args.sizes),
+        "save_result": lambda r: bench_save_result(r, args.repeat, rng, args.sizes),
+        "accel_features": lambda r: bench_accel_features(r, args.repeat, rng),
+        "data_preprocess": lambda r: bench_data_preprocess(r, args.repeat, rng),
+        "compute_rising_return": lambda r: bench_compute_rising_return(r, args.repeat, rng),
+    }
+
+    results = {}
+    for name, bench in benches.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"[Bench] {name}")
+        bench(results)
+
+    if args.save_baseline:
+        threshold = args.threshold if args.threshold is not None else DEFAULT_THRESHOLD
+        min_delta_ms = args.min_delta_ms if args.min_delta_ms is not None else DEFAULT_MIN_DELTA_MS
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"threshold": threshold, "min_delta_ms": min_delta_ms, "results": results}, f, indent=2)
+        print(f"[Bench] Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"[Bench] No baseline at {args.baseline}; run with --save-baseline first.")
+        compare(results, {}, DEFAULT_THRESHOLD)
+        return 0 if args.allow_missing_baseline else 1
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    threshold = args.threshold if args.threshold is not None else baseline.get("threshold", DEFAULT_THRESHOLD)
+    min_delta_ms = (args.min_delta_ms if args.min_delta_ms is not None
+                    else baseline.get("min_delta_ms", DEFAULT_MIN_DELTA_MS))
+    print(f"[Bench] Comparing against {args.baseline} (threshold {threshold:.0f}%, floor {min_delta_ms:.1f} ms)")
+    regressions = compare(results, baseline["results"], threshold, min_delta_ms)
+    missing = missing_metrics(results, baseline["results"])
+    failed = False
+    if regressions:
+        print(f"❌ {len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        failed = True
+    if missing:
+        if args.only:
+            print(f"[Bench] {len(missing)} baseline metric(s) not measured (--only subset)")
+        else:
+            print(f"❌ {len(missing)} baseline metric(s) not measured: {', '.join(missing)}")
+            failed = True
+    if failed:
+        return 1
+    print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
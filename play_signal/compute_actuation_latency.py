@@ -0,0 +1,159 @@
+# -------------------------
+# 명령 신호 vs. 측정 신호 비교: 진동 onset 지연 / 온도 추종 지연·오차
+#   (repo root에서) python -m play_signal.compute_actuation_latency --workers 8
+# -------------------------
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from trial_dataset import SAVE_ROOT, TrialDataset
+
+SAMPLE_RATE = 10000
+ENVELOPE_WINDOW_S = 0.005   # 진동 포락선 smoothing (5 ms)
+MAX_VIB_LAG_S = 0.2
+THERMAL_DT_S = 0.1          # Arduino 로그 재샘플링 간격 (10 Hz)
+MAX_THERMAL_LAG_S = 10.0
+COLUMNS = ["vib_signal", "accel", "arduino", "sample_rate", "station"]
+
+
+# -------------------------
+# 함수: FFT 기반 cross-correlation으로 지연(샘플) 추정
+# -------------------------
+def xcorr_lag(measured, commanded, max_lag):
+    # 부호 있는 지연: +면 measured가 늦음, -면 measured가 앞섬 (AO/AI task 시작 순서가 고정되지 않음)
+    # at_edge: 탐색 범위 끝에 걸린 값 -> 실제 지연이 범위 밖일 수 있으므로 신뢰 불가
+    measured = measured - measured.mean()
+    commanded = commanded - commanded.mean()
+    n = len(measured) + len(commanded)
+    nfft = 1 << (n - 1).bit_length()
+    r = np.fft.irfft(np.fft.rfft(measured, nfft) * np.conj(np.fft.rfft(commanded, nfft)), nfft)
+    r = np.concatenate([r[nfft - max_lag:], r[:max_lag + 1]])  # lag -max_lag .. +max_lag
+    lag = int(np.argmax(r)) - max_lag
+    norm = np.linalg.norm(measured) * np.linalg.norm(commanded)
+    at_edge = max_lag > 0 and abs(lag) >= max_lag - 1
+    return lag, (r[lag + max_lag] / norm if norm > 0 else 0.0), at_edge
+
+
+def envelope(x, window):
+    # 정류 후 moving average (cumsum)
+    c = np.cumsum(np.concatenate([[0.0], np.abs(x)]))
+    env = (c[window:] - c[:-window]) / window
+    return np.concatenate([env, np.full(window - 1, env[-1])])
+
+
+def vibration_latency(vib_signal, accel, sample_rate=SAMPLE_RATE):
+    accel = np.asarray(accel, dtype=np.float64)
+    accel = accel - accel.mean(axis=0)
+    n = min(len(vib_signal), len(accel))
+    window = max(1, int(ENVELOPE_WINDOW_S * sample_rate))
+    if n <= window:
+        return np.nan, np.nan, False
+    cmd_env = envelope(np.asarray(vib_signal[:n], dtype=np.float64), window)
+    meas_env = envelope(np.sqrt(np.sum(accel[:n] ** 2, axis=1)), window)
+    lag, corr, at_edge = xcorr_lag(meas_env, cmd_env, min(int(MAX_VIB_LAG_S * sample_rate), n - 1))
+    return lag / sample_rate * 1000.0, corr, at_edge
+
+
+def thermal_tracking(arduino):
+    # arduino: [Millis, Input_Temperature, Setpoint, Delta, PWM]
+    t = arduino[:, 0] / 1000.0
+    t_grid = np.arange(t[0], t[-1], THERMAL_DT_S)
+    temp = np.interp(t_grid, t, arduino[:, 1])
+    setpoint = np.interp(t_grid, t, arduino[:, 2])
+
+    max_lag = min(int(MAX_THERMAL_LAG_S / THERMAL_DT_S), len(t_grid) - 1)
+    lag, _, at_edge = xcorr_lag(temp, setpoint, max_lag)
+    error = temp - setpoint
+    if lag >= 0:
+        shifted_error = temp[lag:] - setpoint[:len(setpoint) - lag]
+    else:
+        shifted_error = temp[:lag] - setpoint[-lag:]
+    return {
+        "thermal_lag_s": lag * THERMAL_DT_S,
+        "thermal_lag_at_edge": at_edge,
+        "thermal_rmse": float(np.sqrt(np.mean(error ** 2))),
+        "thermal_mae": float(np.mean(np.abs(error))),
+        "thermal_rmse_lag_corrected": float(np.sqrt(np.mean(shifted_error ** 2)))
+    }
+
+
+def analyze_trial(record):
+    result = {
+        "user_id": record["user_id"],
+        "trial": record["trial"],
+        "station": record.get("station") or "unknown"
+    }
+    vib_signal, accel, arduino = record.get("vib_signal"), record.get("accel"), record.get("arduino")
+    if vib_signal is not None and accel is not None and len(vib_signal) > 1 and len(accel) > 1:
+        latency_ms, corr, at_edge = vibration_latency(vib_signal, accel, record.get("sample_rate") or SAMPLE_RATE)
+        result["vib_latency_ms"] = latency_ms
+        result["vib_corr"] = corr
+        result["vib_lag_at_edge"] = at_edge
+    if arduino is not None and len(arduino) > 2:
+        result.update(thermal_tracking(np.asarray(arduino)))
+    return result
+
+
+def analyze_chunk(root, index):
+    results = []
+    for record in TrialDataset(root, columns=COLUMNS, cache_size=1, index=index):
+        try:
+            results.append(analyze_trial(record))
+        except Exception as e:
+            print(f"[Error] user {record['user_id']}, trial {record['trial']} -> {e}")
+    return results
+
+
+# -------------------------
+# 실행: 전체 archive 병렬 분석 -> trial별 CSV + station별 분포
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Actuation latency / fidelity report")
+    parser.add_argument("--root", default=SAVE_ROOT)
+    parser.add_argument("--out", default=os.path.join(SAVE_ROOT, "actuation_latency.csv"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--vib-budget-ms", type=float, default=20.0, help="median |vibration latency| budget")
+    parser.add_argument("--thermal-budget-s", type=float, default=2.0, help="median |thermal lag| budget")
+    args = parser.parse_args()
+
+    index = TrialDataset(args.root, columns=COLUMNS).index
+    chunks = np.array_split(np.arange(len(index)), max(1, args.workers * 4))
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(analyze_chunk, args.root, index.iloc[chunk]) for chunk in chunks if len(chunk)]
+        for future in futures:
+            results.extend(future.result())
+
+    trial_df = pd.DataFrame(results)
+    trial_df.to_csv(args.out, index=False)
+    print(f"Saved per-trial results to {args.out} ({len(trial_df)} trials)")
+    if trial_df.empty:
+        return
+
+    metrics = [c for c in ["vib_latency_ms", "vib_corr", "thermal_lag_s", "thermal_rmse", "thermal_rmse_lag_corrected"]
+               if c in trial_df.columns]
+    summary = trial_df.groupby("station")[metrics].describe(percentiles=[0.5, 0.9])
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        print(summary)
+
+    # 지연은 부호가 있으므로(측정이 앞서는 start skew 포함) 절댓값으로 예산 비교
+    medians = trial_df.groupby("station")[metrics].median()
+    for station, row in medians.iterrows():
+        if abs(row.get("vib_latency_ms", 0)) > args.vib_budget_ms:
+            print(f"⚠️ {station}: median vibration latency {row['vib_latency_ms']:+.1f} ms, |.| > {args.vib_budget_ms} ms")
+        if abs(row.get("thermal_lag_s", 0)) > args.thermal_budget_s:
+            print(f"⚠️ {station}: median thermal lag {row['thermal_lag_s']:+.1f} s, |.| > {args.thermal_budget_s} s")
+
+    # 탐색 범위 끝에 걸린 trial: 실제 지연이 범위 밖일 수 있음
+    for col, label in [("vib_lag_at_edge", "vibration"), ("thermal_lag_at_edge", "thermal")]:
+        if col not in trial_df.columns:
+            continue
+        edge_counts = trial_df[trial_df[col] == True].groupby("station").size()
+        for station, count in edge_counts.items():
+            print(f"⚠️ {station}: {count} trial(s) with {label} lag at the edge of the search window")
+
+
+if __name__ == "__main__":
+    main()
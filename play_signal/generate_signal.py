@@ -1,18 +1,28 @@
+from functools import lru_cache
 import numpy as np
 from scipy.signal import resample
 
 SAMPLE_RATE = 10000
 MIN_FREQ = 50
 MAX_FREQ = 500
+BLOCK_SIZE = 1000  # 스트리밍 출력 블록 크기 (100 ms @ 10 kHz)
 
-# Load calibration Coeffs
-Coeffs = []
-with open('play_signal/Coeff.txt') as file:
-    for line in file:
-        Coeffs.append(10000 / float(line.strip()))
-m = np.mean(Coeffs)
-Coeffs = np.array(Coeffs) / m
-assert len(Coeffs) == (MAX_FREQ - MIN_FREQ + 1), "Coeff.txt length mismatch"
+COEFF_PATH = 'play_signal/Coeff.txt'
+
+
+# Load calibration Coeffs (액추에이터별 보정 테이블)
+@lru_cache(maxsize=None)
+def load_coeffs(path=COEFF_PATH):
+    coeffs = []
+    with open(path) as file:
+        for line in file:
+            coeffs.append(10000 / float(line.strip()))
+    coeffs = np.array(coeffs) / np.mean(coeffs)
+    assert len(coeffs) == (MAX_FREQ - MIN_FREQ + 1), f"{path} length mismatch"
+    return coeffs
+
+
+Coeffs = load_coeffs()
 
 
 def map_frequency(value, min_value, max_value, logscale=False):
@@ -33,43 +43,109 @@ def linterp_index(arr, perc):
     return arr[lower] * (1 - weight) + arr[upper] * weight
 
 
-def generate_signal(vib_amp, vib_freq, TOTAL_DURATION_SEC, duration=None, logscale=False):
+def generate_signal_blocks(vib_amp, vib_freq, TOTAL_DURATION_SEC, duration=None, logscale=False, block_size=BLOCK_SIZE):
+    # 전체 신호를 메모리에 만들지 않고 block_size 단위로 합성 (블록 간 위상 연속)
+    if duration is None:
+        duration = TOTAL_DURATION_SEC
+    elif duration > TOTAL_DURATION_SEC:
+        raise ValueError(f"duration must be <= {TOTAL_DURATION_SEC} seconds")
+    return _signal_blocks(vib_amp, vib_freq, TOTAL_DURATION_SEC, duration, logscale, block_size)
+
+
+def _signal_blocks(vib_amp, vib_freq, TOTAL_DURATION_SEC, duration, logscale, block_size):
+    channels = [{"vib_amp": vib_amp, "vib_freq": vib_freq}]
+    for block in _multichannel_blocks(channels, TOTAL_DURATION_SEC, duration, logscale, block_size):
+        yield block[0]
+
+
+def _stack_envelopes(envelopes):
+    # 길이가 다른 포락선을 (N, max_len)으로 패딩, 채널별 길이는 따로 보관
+    lengths = np.array([len(env) for env in envelopes])
+    stacked = np.zeros((len(envelopes), lengths.max()))
+    for ch, env in enumerate(envelopes):
+        stacked[ch, :len(env)] = env
+    return stacked, lengths[:, None]
+
+
+def _linterp_rows(stacked, lengths, perc):
+    # 행별 linterp_index를 한 번에 계산 (perc: (N, block))
+    index = perc * (lengths - 1)
+    lower = np.floor(index).astype(int)
+    upper = np.minimum(lower + 1, lengths - 1)
+    weight = index - lower
+    return (np.take_along_axis(stacked, lower, axis=1) * (1 - weight)
+            + np.take_along_axis(stacked, upper, axis=1) * weight)
+
+
+def generate_multichannel_blocks(channels, TOTAL_DURATION_SEC, duration=None, logscale=False, block_size=BLOCK_SIZE):
+    # channels: [{"vib_amp", "vib_freq", "delay"(초, 선택), "coeff_path"(선택)}, ...]
+    # coeff_path는 서버 설정(site_channels.json)에서만 옴 - 클라이언트 값을 그대로 넘기지 말 것
+    # -> (N, block_size) 블록 단위로 N채널을 한 번에 합성
     if duration is None:
         duration = TOTAL_DURATION_SEC
     elif duration > TOTAL_DURATION_SEC:
         raise ValueError(f"duration must be <= {TOTAL_DURATION_SEC} seconds")
+    return _multichannel_blocks(channels, TOTAL_DURATION_SEC, duration, logscale, block_size)
+
 
+def _multichannel_blocks(channels, TOTAL_DURATION_SEC, duration, logscale, block_size):
     total_samples = int(TOTAL_DURATION_SEC * SAMPLE_RATE)
     num_output_samples = int(duration * SAMPLE_RATE)
-    vib_signal = np.zeros(num_output_samples, dtype=np.float32)
 
-    phase_acc = 0
-    for i in range(num_output_samples):
-        perc = i / total_samples
-        s_freq = linterp_index(vib_freq, perc)
-        s_amp = linterp_index(vib_amp, perc)
+    amps, amp_lengths = _stack_envelopes([np.asarray(ch["vib_amp"], dtype=np.float64) for ch in channels])
+    freqs, freq_lengths = _stack_envelopes([np.asarray(ch["vib_freq"], dtype=np.float64) for ch in channels])
+    coeffs = np.stack([load_coeffs(ch.get("coeff_path", COEFF_PATH)) for ch in channels])
+    delays = np.array([int(ch.get("delay", 0) * SAMPLE_RATE) for ch in channels])[:, None]
+
+    # 출력 길이는 duration으로 고정: 지연된 채널은 duration 끝에서 잘림 (accel/thermal 기록 구간과 일치)
+    phase_acc = np.zeros((len(channels), 1))
+    for start in range(0, num_output_samples, block_size):
+        i = np.arange(start, min(start + block_size, num_output_samples))[None, :] - delays
+        active = i >= 0
+        perc = np.clip(i, 0, total_samples - 1) / total_samples
+        s_freq = _linterp_rows(freqs, freq_lengths, perc)
+        s_amp = _linterp_rows(amps, amp_lengths, perc) * active
 
         current_freq = map_frequency(s_freq, 0, 1, logscale=logscale)
-        phase_delta = 2 * np.pi * current_freq / SAMPLE_RATE
+        phase = phase_acc + np.cumsum(2 * np.pi * current_freq / SAMPLE_RATE * active, axis=1)
+        phase_acc = phase[:, -1:]
 
-        phase_acc += phase_delta
-        vib_signal[i] = s_amp * np.sin(phase_acc) * Coeffs[int(current_freq) - MIN_FREQ]
+        calib = np.take_along_axis(coeffs, current_freq.astype(int) - MIN_FREQ, axis=1)
+        block = s_amp * np.sin(phase) * calib
+        yield block.astype(np.float32)
 
+
+def generate_signal(vib_amp, vib_freq, TOTAL_DURATION_SEC, duration=None, logscale=False):
+    if duration is None:
+        duration = TOTAL_DURATION_SEC
+    blocks = list(generate_signal_blocks(vib_amp, vib_freq, TOTAL_DURATION_SEC, duration, logscale))
+    vib_signal = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
     return vib_signal, duration
 
 
-def generate_signal_with_thermal(vib_amp, vib_freq, thermal_amp, TOTAL_DURATION_SEC, duration=None, logscale=False, thermal_rate=10000):
-    vib_signal, actual_duration = generate_signal(vib_amp, vib_freq, TOTAL_DURATION_SEC, duration, logscale)
+def generate_multichannel_signal(channels, TOTAL_DURATION_SEC, duration=None, logscale=False):
+    if duration is None:
+        duration = TOTAL_DURATION_SEC
+    blocks = list(generate_multichannel_blocks(channels, TOTAL_DURATION_SEC, duration, logscale))
+    vib_signals = np.concatenate(blocks, axis=1) if blocks else np.zeros((len(channels), 0), dtype=np.float32)
+    return vib_signals, duration
 
-    # vib_signal의 길이에 맞춰 thermal_amp를 interpolation
-    vib_len = len(vib_signal)
+
+def generate_thermal(thermal_amp, num_samples, duration, thermal_rate=10000):
+    # vib_signal의 길이(num_samples)에 맞춰 thermal_amp를 interpolation
     thermal_full = np.interp(
-        np.linspace(0, len(thermal_amp) - 1, vib_len),
+        np.linspace(0, len(thermal_amp) - 1, num_samples),
         np.arange(len(thermal_amp)),
         thermal_amp
     )
 
     # downsample to thermal_rate (예: 100Hz)
-    thermal_sampled = resample(thermal_full, int(actual_duration * thermal_rate))
+    return resample(thermal_full, int(duration * thermal_rate))
+
+
+def generate_signal_with_thermal(vib_amp, vib_freq, thermal_amp, TOTAL_DURATION_SEC, duration=None, logscale=False, thermal_rate=10000):
+    vib_signal, actual_duration = generate_signal(vib_amp, vib_freq, TOTAL_DURATION_SEC, duration, logscale)
+
+    thermal_sampled = generate_thermal(thermal_amp, len(vib_signal), actual_duration, thermal_rate)
 
     return vib_signal, thermal_sampled
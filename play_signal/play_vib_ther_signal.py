@@ -4,16 +4,81 @@ import json
 import numpy as np
 import csv
 import threading
+import itertools
 import nidaqmx
-from nidaqmx.constants import AcquisitionType, TerminalConfiguration
+from nidaqmx.constants import AcquisitionType, RegenerationMode, TerminalConfiguration
 import os
 from datetime import datetime
-from play_signal.generate_signal import generate_signal_with_thermal
+from play_signal.generate_signal import BLOCK_SIZE, generate_signal_blocks, generate_multichannel_blocks, generate_thermal
+
+# 진동 출력 방식: 1이면 블록 스트리밍(CONTINUOUS, non-regenerating), 아니면 기존 FINITE 출력
+# 스트리밍은 스테이션에서 underflow(-200290) 없음을 확인한 뒤에 켤 것
+STREAM_DAQ_OUTPUT = os.environ.get("STREAM_DAQ_OUTPUT") == "1"
 
 # 전역 스레드 객체 추적 및 종료 플래그
 active_threads = {}
 thread_stop_flags = {}
 
+# 다중 부위 출력: body site code(points.json) -> AO 채널 / 보정 테이블 (서버 설정, 클라이언트는 site만 보냄)
+SITE_CHANNELS_PATH = 'play_signal/site_channels.json'
+POINTS_PATH = 'static/src/points.json'
+_site_channels = None
+
+
+def load_site_channels():
+    # 처음 다중 부위 요청이 올 때 읽음: 설정이 잘못돼도 app import/단일 채널 재생은 영향 없음
+    global _site_channels
+    if _site_channels is None:
+        with open(SITE_CHANNELS_PATH) as file:
+            site_channels = json.load(file)
+        with open(POINTS_PATH) as file:
+            point_codes = {point["code"] for point in json.load(file)}
+        unknown_codes = sorted(set(site_channels) - point_codes)
+        if unknown_codes:
+            raise ValueError(f"{SITE_CHANNELS_PATH} has site codes not in {POINTS_PATH}: {unknown_codes}")
+        _site_channels = site_channels
+    return _site_channels
+
+
+def _envelope(values, name, site, value_range=None):
+    try:
+        envelope = np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        envelope = None
+    if envelope is None or envelope.ndim != 1 or len(envelope) == 0 or not np.all(np.isfinite(envelope)):
+        raise ValueError(f"{name} for site {site} must be a non-empty list of finite numbers")
+    if value_range is not None and (envelope.min() < value_range[0] or envelope.max() > value_range[1]):
+        raise ValueError(f"{name} for site {site} must be within {list(value_range)}")
+    return envelope
+
+
+def resolve_channels(channels, duration):
+    # 클라이언트 channels([{"site", "vib_amp", "vib_freq", "delay"}, ...])를 서버 설정으로 매핑
+    # 알 수 없는/중복 site, 잘못된 envelope, [0, duration) 밖의 delay는 ValueError
+    site_channels = load_site_channels()
+    duration = float(duration)
+    resolved = []
+    for ch in channels:
+        site = str(ch.get("site"))
+        if site not in site_channels:
+            raise ValueError(f"Unknown body site: {site}")
+        if any(r["site"] == site for r in resolved):
+            raise ValueError(f"Duplicate body site: {site}")
+        if "vib_amp" not in ch or "vib_freq" not in ch:
+            raise ValueError(f"Missing vib_amp/vib_freq for site {site}")
+        delay = float(ch.get("delay", 0))
+        if not np.isfinite(delay) or not 0.0 <= delay < duration:
+            raise ValueError(f"delay for site {site} must be in [0, {duration}) seconds")
+        resolved.append({
+            "site": site,
+            "vib_amp": _envelope(ch["vib_amp"], "vib_amp", site),
+            "vib_freq": _envelope(ch["vib_freq"], "vib_freq", site, value_range=(0.0, 1.0)),
+            "delay": delay,
+            "ao": site_channels[site]["ao"],
+            "coeff_path": site_channels[site]["coeff_path"]
+        })
+    return resolved
+
 def stop_all_threads():
     for name, thread in active_threads.items():
         flag = thread_stop_flags.get(name)
@@ -27,6 +92,7 @@ def stop_all_threads():
 def run_stim_from_json(data, event_queue=None):
     SAMPLE_RATE = 10000
     THERMAL_RATE = 10
+    BUFFER_BLOCKS = 4  # DAQ 출력 버퍼 크기 (블록 단위)
     TOTAL_DURATION_SEC = data.get("duration", 10)
     timestamp = str(data.get("timestamp", int(time.time())))
     user_id = data.get("user_id", "default")
@@ -50,23 +116,88 @@ def run_stim_from_json(data, event_queue=None):
         print("[ERROR] Could not reconnect to Arduino.")
         return None
 
-    def Run_DAQ(out_chan, vib_signal, stop_flag):
+    def zero_output(out_chan, num_channels):
+        # 타이밍 없는 on-demand task로 0 V 출력 (정지 후 마지막 샘플 값이 유지되지 않도록)
+        try:
+            with nidaqmx.Task() as task:
+                task.ao_channels.add_ao_voltage_chan(out_chan)
+                task.write([0.0] * num_channels if num_channels > 1 else 0.0, auto_start=True)
+        except Exception as e:
+            print("[DAQ ZERO ERROR]", e)
+
+    def Run_DAQ_finite(task, vib_blocks, stop_flag):
+        # 기존 방식: 전체 신호를 합성해 FINITE task로 한 번에 출력
+        blocks = list(vib_blocks)
+        if not blocks:
+            return None
+        vib_signal = np.concatenate(blocks, axis=-1)
+        task.timing.cfg_samp_clk_timing(
+            SAMPLE_RATE,
+            sample_mode=AcquisitionType.FINITE,
+            samps_per_chan=vib_signal.shape[-1]
+        )
+        task.write(vib_signal, auto_start=True)
+        while task.is_task_done() is False:
+            if stop_flag.is_set():
+                print("[DAQ] Stop requested")
+                break
+            time.sleep(0.01)
+        task.stop()
+        return vib_signal
+
+    def Run_DAQ_streaming(task, vib_blocks, stop_flag):
+        # 블록 단위 스트리밍 출력: 재생 직전 BUFFER_BLOCKS 만큼만 DAQ 버퍼에 채워 둠
+        task.timing.cfg_samp_clk_timing(
+            SAMPLE_RATE,
+            sample_mode=AcquisitionType.CONTINUOUS,
+            samps_per_chan=BLOCK_SIZE * BUFFER_BLOCKS
+        )
+        task.out_stream.regen_mode = RegenerationMode.DONT_ALLOW_REGENERATION
+
+        blocks = iter(vib_blocks)
+        written = 0
+        block = None
+        for block in itertools.islice(blocks, BUFFER_BLOCKS - 1):
+            written += task.write(block, auto_start=False)
+        if written == 0:
+            return None
+        task.start()
+
+        for block in blocks:
+            if stop_flag.is_set():
+                print("[DAQ] Stop requested")
+                break
+            written += task.write(block, timeout=10.0)
+        else:
+            # 마지막에 0 V 블록을 붙여 두고, 신호 부분이 모두 출력되면 정지
+            # (0 V 블록이 버퍼에 남아 있을 때 멈춰야 underflow(-200290)가 나지 않음)
+            zeros_shape = block.shape[:-1] + (BLOCK_SIZE,)
+            signal_end = written
+            written += task.write(np.zeros(zeros_shape, dtype=np.float32), timeout=10.0)
+            while task.out_stream.total_samp_per_chan_generated < signal_end:
+                if stop_flag.is_set():
+                    print("[DAQ] Stop requested")
+                    break
+                time.sleep(0.01)
+        task.stop()
+        return block
+
+    def Run_DAQ(out_chan, vib_blocks, stop_flag):
+        # out_chan이 여러 채널("Dev1/ao0,Dev1/ao1")이면 블록은 (채널 수, 샘플 수) 2D 배열
+        # STREAM_DAQ_OUTPUT=1 일 때만 스트리밍 출력 (스테이션 검증 전까지 기본은 FINITE)
+        last = None
         try:
             with nidaqmx.Task() as task:
                 task.ao_channels.add_ao_voltage_chan(out_chan)
-                task.timing.cfg_samp_clk_timing(
-                    SAMPLE_RATE,
-                    sample_mode=AcquisitionType.FINITE,
-                    samps_per_chan=len(vib_signal)
-                )
-                task.write(vib_signal, auto_start=True)
-                while task.is_task_done() is False:
-                    if stop_flag.is_set():
-                        print("[DAQ] Stop requested")
-                        break
-                    time.sleep(0.01)
+                if STREAM_DAQ_OUTPUT:
+                    last = Run_DAQ_streaming(task, vib_blocks, stop_flag)
+                else:
+                    last = Run_DAQ_finite(task, vib_blocks, stop_flag)
         except Exception as e:
             print("[DAQ ERROR]", e)
+        finally:
+            if last is not None:
+                zero_output(out_chan, last.shape[0] if last.ndim == 2 else 1)
 
     def record_accelerometer_data(filepath, stop_flag):
         with nidaqmx.Task() as readtask:
@@ -92,17 +223,38 @@ def run_stim_from_json(data, event_queue=None):
             except Exception as e:
                 print("[ACCEL] Error reading data:", e)
 
-    vib_amp = np.array(data['vib_amp'])
-    vib_freq = np.array(data['vib_freq'])
-    thr_amp_raw = data.get('thr_amp', [0.0] * len(vib_amp))
+    channels = resolve_channels(data["channels"], data.get("duration", 5)) if data.get("channels") else None
+    if channels:
+        envelope_len = len(data.get('vib_amp', channels[0]["vib_amp"]))
+    else:
+        vib_amp = np.array(data['vib_amp'])
+        vib_freq = np.array(data['vib_freq'])
+        envelope_len = len(vib_amp)
+    thr_amp_raw = data.get('thr_amp', [0.0] * envelope_len)
     thermal_amp = np.array(thr_amp_raw)
     thermal_amp = np.append(thermal_amp, 0.0)
 
-    vib_signal, thermal_resampled = generate_signal_with_thermal(
-        vib_amp, vib_freq, thermal_amp,
-        TOTAL_DURATION_SEC=TOTAL_DURATION_SEC,
-        duration=data.get("duration", 5),
-        logscale=True,
+    duration = data.get("duration", 5)
+    # 진동 신호는 Run_DAQ에서 블록 단위로 합성/출력
+    if channels:
+        # 다중 부위: site별 AO 채널을 하나의 다채널 task로 출력
+        vib_out_chan = ",".join(ch["ao"] for ch in channels)
+        vib_blocks = generate_multichannel_blocks(
+            channels,
+            TOTAL_DURATION_SEC=TOTAL_DURATION_SEC,
+            duration=duration,
+            logscale=True
+        )
+    else:
+        vib_out_chan = "Dev1/ao0"
+        vib_blocks = generate_signal_blocks(
+            vib_amp, vib_freq,
+            TOTAL_DURATION_SEC=TOTAL_DURATION_SEC,
+            duration=duration,
+            logscale=True
+        )
+    thermal_resampled = generate_thermal(
+        thermal_amp, int(duration * SAMPLE_RATE), duration,
         thermal_rate=THERMAL_RATE
     )
 
@@ -156,7 +308,7 @@ def run_stim_from_json(data, event_queue=None):
         threads = {
             "log": threading.Thread(target=log_receiver),
             "thermal": threading.Thread(target=send_delta_thermal),
-            "daq": threading.Thread(target=Run_DAQ, args=("Dev1/ao0", vib_signal, stop_flag)),
+            "daq": threading.Thread(target=Run_DAQ, args=(vib_out_chan, vib_blocks, stop_flag)),
             "accel": threading.Thread(target=record_accelerometer_data, args=(accel_log_path, stop_flag))
         }
 
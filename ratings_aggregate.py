@@ -0,0 +1,187 @@
+import csv
+import json
+import os
+import threading
+import numpy as np
+from trial_dataset import META_KEYS, RATING_KEYS, SAVE_ROOT, trial_meta
+
+GROUP_KEYS = [
+    "user_id", "gender", "vibrationInfo", "thermalInfo", "station",
+    "vib_amp_level", "vib_freq_level", "thermal_level"
+]
+ENVELOPE_LEVELS = 4        # vib_amp/vib_freq 평균(0~1)을 4단계로 구분
+THERMAL_NEUTRAL = 0.5      # |thermal 평균| < 0.5 이면 neutral
+
+
+def _level(value):
+    if value is None:
+        return "unknown"
+    return str(min(int(value * ENVELOPE_LEVELS), ENVELOPE_LEVELS - 1))
+
+
+def _thermal_level(value):
+    if value is None:
+        return "unknown"
+    if value >= THERMAL_NEUTRAL:
+        return "warm"
+    if value <= -THERMAL_NEUTRAL:
+        return "cool"
+    return "neutral"
+
+
+def group_values(user_id, gender, meta):
+    return {
+        "user_id": str(user_id),
+        "gender": str(gender),
+        "vibrationInfo": str(meta.get("vibrationInfo")),
+        "thermalInfo": str(meta.get("thermalInfo")),
+        "station": str(meta.get("station") or "unknown"),
+        "vib_amp_level": _level(meta.get("vib_amp_mean")),
+        "vib_freq_level": _level(meta.get("vib_freq_mean")),
+        "thermal_level": _thermal_level(meta.get("thermal_mean"))
+    }
+
+
+class RatingsAggregate:
+    """In-memory columnar table of trial ratings for live summaries.
+
+    Group columns are stored as integer codes (one vocabulary per column) and
+    ratings as floats, so grouped count/mean/std is a few NumPy passes.
+    `start_loading` reads the existing archive once in a background thread
+    (read-only, without holding the lock during file I/O) while `add_trial`
+    from save_result keeps appending; results are cached until the next update.
+    Loading is started on the first analytics request, not at import.
+    """
+
+    def __init__(self, root=SAVE_ROOT):
+        self.root = root
+        self._lock = threading.Lock()
+        self.loaded = False
+        self._started = False
+        self._vocab = {key: {} for key in GROUP_KEYS}
+        self._codes = {key: [] for key in GROUP_KEYS}
+        self._ratings = {key: [] for key in RATING_KEYS}
+        self._trials = set()  # (user_id, trial) 중복 추가 방지
+        self._version = 0
+        self._arrays = None
+        self._stats_cache = {}
+
+    def __len__(self):
+        return len(self._codes[GROUP_KEYS[0]])
+
+    def _append(self, user_id, trial, groups, ratings):
+        if (str(user_id), int(trial)) in self._trials:
+            return
+        self._trials.add((str(user_id), int(trial)))
+        for key in GROUP_KEYS:
+            vocab = self._vocab[key]
+            self._codes[key].append(vocab.setdefault(groups[key], len(vocab)))
+        for key in RATING_KEYS:
+            value = ratings.get(key)
+            self._ratings[key].append(np.nan if value is None else float(value))
+        self._version += 1
+
+    def start_loading(self):
+        # 첫 analytics 요청에서 호출: 기존 archive를 background thread에서 한 번만 읽음
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        root = os.path.abspath(self.root)
+        threading.Thread(target=self._load_archive, args=(root,), daemon=True).start()
+
+    def _read_meta(self, root, user_id, trial):
+        # 읽기 전용: TrialDataset이 만든 meta sidecar가 있으면 사용, 없으면 collected_data.json
+        trial_dir = os.path.join(root, str(user_id), str(trial))
+        meta_path = os.path.join(trial_dir, f"{trial}_meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if all(key in meta for key in META_KEYS):
+                return meta
+        with open(os.path.join(trial_dir, f"{trial}_collected_data.json")) as f:
+            return trial_meta(json.load(f))
+
+    def _load_archive(self, root):
+        dataset_path = os.path.join(root, "dataset.csv")
+        if os.path.exists(dataset_path):
+            with open(dataset_path, "r", newline='') as f:
+                rows = list(csv.DictReader(f))
+            for row in rows:
+                try:
+                    meta = self._read_meta(root, row["user_id"], row["trial"])
+                    groups = group_values(row["user_id"], row["gender"], meta)
+                except Exception as e:
+                    print(f"[Error] user {row['user_id']}, trial {row['trial']} -> {e}")
+                    continue
+                with self._lock:
+                    self._append(row["user_id"], row["trial"], groups, meta["ratings"])
+        self.loaded = True
+        print(f"[Analytics] Loaded {len(self)} trials into ratings aggregate")
+
+    def add_trial(self, user_id, gender, trial, data):
+        # save_result에서 호출: 요청 본문(data)만 사용, 파일은 읽지 않음
+        # (archive 로딩 중이어도 바로 추가, 같은 trial은 _append에서 한 번만 반영)
+        meta = trial_meta(data)
+        groups = group_values(user_id, gender, meta)
+        with self._lock:
+            self._append(user_id, trial, groups, meta["ratings"])
+
+    def _snapshot(self):
+        if self._arrays is None or self._arrays[0] != self._version:
+            codes = {key: np.array(self._codes[key], dtype=np.int64) for key in GROUP_KEYS}
+            ratings = {key: np.array(self._ratings[key], dtype=np.float64) for key in RATING_KEYS}
+            self._arrays = (self._version, codes, ratings)
+        return self._arrays[1], self._arrays[2]
+
+    def stats(self, group_by=()):
+        group_by = tuple(group_by)
+        for key in group_by:
+            if key not in GROUP_KEYS:
+                raise ValueError(f"Unknown group key: {key}")
+
+        with self._lock:
+            if self._stats_cache.get("version") != self._version:
+                self._stats_cache = {"version": self._version}  # 새 trial이 추가되면 캐시 무효화
+            if group_by in self._stats_cache:
+                return self._stats_cache[group_by]
+
+            codes, ratings = self._snapshot()
+            n = len(self)
+            if n == 0:
+                return []
+            if group_by:
+                unique_rows, inverse = np.unique(
+                    np.stack([codes[key] for key in group_by], axis=1), axis=0, return_inverse=True)
+                inverse = inverse.reshape(-1)
+            else:
+                unique_rows, inverse = np.zeros((1, 0), dtype=np.int64), np.zeros(n, dtype=np.int64)
+            num_groups = len(unique_rows)
+
+            groups = []
+            labels = {key: list(self._vocab[key]) for key in group_by}
+            counts = np.bincount(inverse, minlength=num_groups)
+            summaries = {}
+            for key, values in ratings.items():
+                valid = ~np.isnan(values)
+                cnt = np.bincount(inverse[valid], minlength=num_groups)
+                total = np.bincount(inverse[valid], weights=values[valid], minlength=num_groups)
+                total_sq = np.bincount(inverse[valid], weights=values[valid] ** 2, minlength=num_groups)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    mean = total / cnt
+                    std = np.sqrt(np.maximum(total_sq / cnt - mean ** 2, 0.0))
+                summaries[key] = (cnt, mean, std)
+
+            for g in range(num_groups):
+                group = {key: labels[key][unique_rows[g, j]] for j, key in enumerate(group_by)}
+                group["count"] = int(counts[g])
+                for key, (cnt, mean, std) in summaries.items():
+                    group[key] = {
+                        "n": int(cnt[g]),
+                        "mean": float(mean[g]) if cnt[g] else None,
+                        "std": float(std[g]) if cnt[g] else None
+                    }
+                groups.append(group)
+
+            self._stats_cache[group_by] = groups
+            return groups
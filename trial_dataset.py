@@ -0,0 +1,225 @@
+import json
+import os
+import tempfile
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+SAVE_ROOT = "static/save_data"
+RATING_KEYS = ["roughness", "valence", "arousal", "referral", "masking"]
+META_KEYS = [
+    "sample_rate", "duration", "vibrationInfo", "thermalInfo", "station",
+    "vib_amp_mean", "vib_freq_mean", "thermal_mean"
+]
+SIGNAL_KEYS = ["vib_signal", "accel", "arduino"]
+COLUMN_GROUPS = {
+    "ratings": RATING_KEYS,
+    "meta": META_KEYS,
+    "signals": SIGNAL_KEYS
+}
+ARDUINO_COLUMNS = ["Millis", "Input_Temperature", "Setpoint", "Delta", "PWM"]
+
+
+def _resolve_columns(columns):
+    # None -> 전체, "ratings"/"signals"/"meta" 그룹 이름 또는 개별 컬럼 이름
+    if columns is None:
+        columns = list(COLUMN_GROUPS)
+    elif isinstance(columns, str):
+        columns = [columns]
+    resolved = []
+    for col in columns:
+        names = COLUMN_GROUPS.get(col, [col])
+        for name in names:
+            if name not in RATING_KEYS + META_KEYS + SIGNAL_KEYS:
+                raise ValueError(f"Unknown column: {name}")
+            if name not in resolved:
+                resolved.append(name)
+    return resolved
+
+
+def _atomic_write(path, write, mode="wb"):
+    # 같은 폴더의 고유한 임시 파일에 쓴 뒤 교체: 여러 프로세스(app, 분석 스크립트)가
+    # 동시에 같은 파일을 만들어도 깨진 파일을 읽거나 서로의 임시 파일을 덮어쓰지 않음
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _save_npy(path, array):
+    _atomic_write(path, lambda f: np.save(f, array))
+
+
+def _mean_or_none(values):
+    return float(np.mean(values)) if values is not None and len(values) else None
+
+
+def trial_meta(collected_data):
+    # collected_data.json(save_result 요청 본문) -> 신호를 제외한 작은 요약
+    body_sites = collected_data.get("body_sites", {})
+    ratings = collected_data.get("ratings", {})
+    return {
+        "sample_rate": collected_data.get("sample_rate"),
+        "duration": collected_data.get("duration"),
+        "vibrationInfo": body_sites.get("vibrationInfo"),
+        "thermalInfo": body_sites.get("thermalInfo"),
+        "station": collected_data.get("station"),
+        "vib_amp_mean": _mean_or_none(collected_data.get("vib_amp")),
+        "vib_freq_mean": _mean_or_none(collected_data.get("vib_freq")),
+        "thermal_mean": _mean_or_none(collected_data.get("thermal_signal")),
+        "ratings": {
+            key: float(ratings[key]) if ratings.get(key) not in (None, "") else None
+            for key in RATING_KEYS
+        }
+    }
+
+
+class TrialDataset:
+    """Lazy view over the trial archive (static/save_data/<user>/<trial>/).
+
+    Only dataset.csv is read up front. Ratings/meta are read per trial from a
+    small `<trial>_meta.json` sidecar and signals are memory-mapped from
+    `.npy` copies; each is created from the original files the first time
+    that column is requested.
+    Recently opened trials are kept in an LRU cache of `cache_size` entries.
+
+        ds = TrialDataset(columns="ratings").filter(gender=0, ratings={"valence": (50, 100)})
+        for batch in ds.iter_batches(32):
+            ...
+    """
+
+    def __init__(self, root=SAVE_ROOT, columns=None, cache_size=32, index=None):
+        self.root = root
+        self.columns = _resolve_columns(columns)
+        self.cache_size = cache_size
+        if index is None:
+            index = pd.read_csv(
+                os.path.join(root, "dataset.csv"),
+                usecols=["user_id", "gender", "trial"],
+                dtype={"user_id": str}
+            )
+        self.index = index.reset_index(drop=True)
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        row = self.index.iloc[i]
+        key = (row["user_id"], int(row["trial"]))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        gender = int(row["gender"]) if pd.notna(row["gender"]) else None
+        record = self._load(row["user_id"], int(row["trial"]), gender)
+        self._cache[key] = record
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return record
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def iter_batches(self, batch_size, shuffle=False, seed=None):
+        order = np.arange(len(self))
+        if shuffle:
+            np.random.default_rng(seed).shuffle(order)
+        for start in range(0, len(order), batch_size):
+            yield [self[i] for i in order[start:start + batch_size]]
+
+    def select(self, columns):
+        # 같은 index에 대해 다른 컬럼만 읽는 view
+        return TrialDataset(self.root, columns, self.cache_size, self.index)
+
+    def filter(self, user_id=None, gender=None, ratings=None):
+        # user_id/gender: 값 또는 리스트, ratings: {key: 값 또는 (min, max)}
+        mask = np.ones(len(self.index), dtype=bool)
+        if user_id is not None:
+            user_ids = [user_id] if isinstance(user_id, str) else list(user_id)
+            mask &= self.index["user_id"].isin(user_ids).to_numpy()
+        if gender is not None:
+            genders = [gender] if np.isscalar(gender) else list(gender)
+            mask &= self.index["gender"].isin(genders).to_numpy()
+        if ratings:
+            for i in np.flatnonzero(mask):
+                row = self.index.iloc[i]
+                try:
+                    meta = self._meta(row["user_id"], int(row["trial"]))
+                except Exception as e:
+                    print(f"[Error] user {row['user_id']}, trial {row['trial']} -> {e}")
+                    mask[i] = False
+                    continue
+                for key, cond in ratings.items():
+                    value = meta["ratings"].get(key)
+                    if isinstance(cond, tuple):
+                        ok = value is not None and cond[0] <= value <= cond[1]
+                    else:
+                        ok = value == cond
+                    if not ok:
+                        mask[i] = False
+                        break
+        return TrialDataset(self.root, self.columns, self.cache_size, self.index[mask])
+
+    # -------------------------
+    # per-trial loading
+    # -------------------------
+    def _trial_path(self, user_id, trial, suffix):
+        return os.path.join(self.root, str(user_id), str(trial), f"{trial}_{suffix}")
+
+    def _meta(self, user_id, trial):
+        meta_path = self._trial_path(user_id, trial, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if all(key in meta for key in META_KEYS):
+                return meta
+
+        # 최초 접근: collected_data.json을 한 번 읽어 meta sidecar 생성 (신호는 _signal에서만)
+        with open(self._trial_path(user_id, trial, "collected_data.json")) as f:
+            meta = trial_meta(json.load(f))
+        _atomic_write(meta_path, lambda f: json.dump(meta, f), mode="w")
+        return meta
+
+    def _signal(self, user_id, trial, name):
+        if name == "vib_signal":
+            npy_path = self._trial_path(user_id, trial, "vib_signal.npy")
+            if not os.path.exists(npy_path):
+                with open(self._trial_path(user_id, trial, "collected_data.json")) as f:
+                    vib_signal = json.load(f).get("vib_signal", [])
+                _save_npy(npy_path, np.asarray(vib_signal, dtype=np.float32))
+        else:
+            npy_path = self._trial_path(user_id, trial, f"{name}_log.npy")
+            if not os.path.exists(npy_path):
+                csv_path = self._trial_path(user_id, trial, f"{name}_log.csv")
+                if not os.path.exists(csv_path):
+                    return None
+                if name == "accel":
+                    array = np.loadtxt(csv_path, delimiter=",", skiprows=1, ndmin=2)
+                else:
+                    array = pd.read_csv(csv_path, usecols=ARDUINO_COLUMNS).to_numpy(dtype=np.float64)
+                _save_npy(npy_path, array)
+        return np.load(npy_path, mmap_mode="r")
+
+    def _load(self, user_id, trial, gender):
+        record = {"user_id": user_id, "gender": gender, "trial": trial}
+        try:
+            if any(col in RATING_KEYS + META_KEYS for col in self.columns):
+                meta = self._meta(user_id, trial)
+                for col in self.columns:
+                    if col in RATING_KEYS:
+                        record[col] = meta["ratings"].get(col)
+                    elif col in META_KEYS:
+                        record[col] = meta.get(col)
+            for col in self.columns:
+                if col in SIGNAL_KEYS:
+                    record[col] = self._signal(user_id, trial, col)
+        except Exception as e:
+            print(f"[Error] user {user_id}, trial {trial} -> {e}")
+        return record